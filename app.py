@@ -7,34 +7,164 @@ import streamlit as st
 import pandas as pd
 import sqlite3
 import altair as alt
+import numpy as np
+from typing import List, Optional, Tuple
 
 DB_PATH = "data.db"
+# tables the loaders may interpolate into SQL
+TABLES = ("weather", "precipitation")
+# upper bound on points per series handed to the chart (full data stays in the tables)
+MAX_CHART_POINTS = 3000
 
+PERIOD_ORDER = [
+    "Now",
+    "Past10Min",
+    "Past1hr",
+    "Past3hr",
+    "Past6hr",
+    "Past12hr",
+    "Past24hr",
+    "Past2days",
+    "Past3days",
+]
+PERIOD_RANK = {p: i for i, p in enumerate(PERIOD_ORDER)}
 
-@st.cache_data
-def load_data(db_path: str) -> pd.DataFrame:
-    conn = sqlite3.connect(db_path)
-    try:
-        df = pd.read_sql_query(
-            "SELECT id, location, date, min_temp, max_temp, description, inserted_at FROM weather ORDER BY date DESC, id DESC",
-            conn,
-        )
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: pick `n_out` indices that preserve the shape of (x, y)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        # average point of the next bucket
+        avg_start = int(np.floor((i + 1) * every)) + 1
+        avg_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        # pick the point in the current bucket forming the largest triangle
+        start = int(np.floor(i * every)) + 1
+        end = int(np.floor((i + 1) * every)) + 1
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        idx[i + 1] = a
+    idx[-1] = n - 1
+    return idx
+
+
+def downsample_series(s: pd.Series, n_out: int = MAX_CHART_POINTS) -> pd.Series:
+    """Reduce a datetime-indexed series to at most `n_out` points for rendering."""
+    if len(s) <= n_out:
+        return s
+    s = s[s.index.notna() & s.notna()]
+    x = pd.DatetimeIndex(s.index).asi8.astype(float)
+    y = s.to_numpy(dtype=float)
+    return s.iloc[_lttb_indices(x, y, n_out)]
+
+
+def downsample_frame(df: pd.DataFrame, n_out: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """Keep the rows of a wide datetime-indexed frame selected by LTTB on any column.
+
+    Each column gets an equal share of `n_out`, so the union stays within the cap.
+    """
+    if len(df) <= n_out or len(df.columns) == 0:
         return df
-    finally:
-        conn.close()
+    per_col = max(n_out // len(df.columns), 3)
+    keep = pd.Index([])
+    for col in df.columns:
+        keep = keep.union(downsample_series(df[col], per_col).index)
+    return df.loc[df.index.isin(keep)]
+
+
+@st.cache_data
+def build_period_chart_spec(records: Tuple[Tuple[str, Optional[float]], ...]) -> dict:
+    """Vega-Lite spec for precipitation across periods, cached on the (period, value) rows."""
+    periods_df = pd.DataFrame(list(records), columns=["period", "precipitation"])
+    return alt.Chart(periods_df).mark_line(point=True).encode(
+        x=alt.X("period:N", sort=PERIOD_ORDER, title="Period"),
+        y=alt.Y("precipitation:Q", title="Precipitation (mm)"),
+    ).properties(width=700).to_dict()
+
+
+@st.cache_resource
+def get_conn(db_path: str) -> sqlite3.Connection:
+    # one long-lived read-only connection shared by all reruns/sessions
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    # mmap is per-connection; let repeated queries read straight from the page cache
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def _check_table(table: str) -> None:
+    # table names can't be bound as parameters, so only known tables may be interpolated
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table!r}")
+
+
+@st.cache_data
+def count_rows(db_path: str, table: str) -> int:
+    _check_table(table)
+    return get_conn(db_path).execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@st.cache_data
+def load_locations(db_path: str, table: str) -> List[str]:
+    _check_table(table)
+    cur = get_conn(db_path).execute(f"SELECT DISTINCT location FROM {table} WHERE location IS NOT NULL ORDER BY location")
+    return [r[0] for r in cur.fetchall()]
+
+
+def _location_filter(location: Optional[str]) -> Tuple[str, Tuple]:
+    if location is None:
+        return "", ()
+    return " WHERE location = ?", (location,)
 
 
 @st.cache_data
-def load_precip(db_path: str) -> pd.DataFrame:
-    conn = sqlite3.connect(db_path)
+def load_data(db_path: str, location: Optional[str] = None) -> pd.DataFrame:
+    where, params = _location_filter(location)
+    df = pd.read_sql_query(
+        "SELECT id, location, date, min_temp, max_temp, description, inserted_at FROM weather"
+        f"{where} ORDER BY date DESC, id DESC",
+        get_conn(db_path),
+        params=params,
+    )
+    df["location"] = df["location"].astype("category")
+    return df
+
+
+def _parse_dates(dates: pd.Series) -> pd.Series:
+    """Parse ISO8601 strings, never raising: unparseable values become NaT."""
     try:
-        df = pd.read_sql_query(
-            "SELECT id, location, date, period, precipitation, inserted_at FROM precipitation ORDER BY date DESC, id DESC",
-            conn,
-        )
-        return df
-    finally:
-        conn.close()
+        return pd.to_datetime(dates, errors="coerce", format="ISO8601", cache=True)
+    except (ValueError, TypeError):
+        pass
+    # e.g. a naive fallback timestamp mixed with +08:00 rows: normalise everything to UTC
+    try:
+        return pd.to_datetime(dates, errors="coerce", format="ISO8601", cache=True, utc=True)
+    except (ValueError, TypeError):
+        return pd.Series(pd.NaT, index=dates.index, dtype="datetime64[ns]")
+
+
+@st.cache_data
+def load_precip(db_path: str, location: Optional[str] = None) -> pd.DataFrame:
+    where, params = _location_filter(location)
+    df = pd.read_sql_query(
+        "SELECT id, location, date, period, precipitation, inserted_at FROM precipitation"
+        f"{where} ORDER BY date DESC, id DESC",
+        get_conn(db_path),
+        params=params,
+    )
+    df["location"] = df["location"].astype("category")
+    # parse once per DB load instead of on every rerun
+    df["date_parsed"] = _parse_dates(df["date"])
+    return df
 
 
 def main():
@@ -42,48 +172,55 @@ def main():
     st.write("Displays parsed weather data stored in `data.db`.")
 
     try:
-        df = load_data(DB_PATH)
+        n_rows = count_rows(DB_PATH, "weather")
+        weather_locs = load_locations(DB_PATH, "weather")
     except Exception as e:
         st.error(f"Failed to load data from {DB_PATH}: {e}")
         return
 
-    st.sidebar.write(f"Rows: {len(df)}")
+    st.sidebar.write(f"Rows: {n_rows}")
 
-    if df.empty:
+    if n_rows == 0:
         st.info("No data found. Run `python fetch_and_store.py` to fetch and store data.")
         return
 
-    locations = ["All"] + sorted(df["location"].dropna().unique().tolist())
+    locations = ["All"] + weather_locs
     sel = st.sidebar.selectbox("Filter by location", locations)
 
-    if sel != "All":
-        df = df[df["location"] == sel]
+    # filtering happens in SQL so only the selected location's rows are loaded
+    try:
+        df = load_data(DB_PATH, None if sel == "All" else sel)
+    except Exception as e:
+        st.error(f"Failed to load data from {DB_PATH}: {e}")
+        return
 
     st.dataframe(df)
 
     # precipitation plot
     try:
-        pdf = load_precip(DB_PATH)
+        n_precip = count_rows(DB_PATH, "precipitation")
+        precip_locs = load_locations(DB_PATH, "precipitation")
     except Exception as e:
         st.warning(f"Cannot load precipitation data: {e}")
         return
 
-    if pdf.empty:
+    if n_precip == 0:
         st.info("No precipitation data available.")
         return
 
     # filter by location for precip (default to same selection as weather)
-    locs_precip = ["All"] + sorted(pdf["location"].dropna().unique().tolist())
+    locs_precip = ["All"] + precip_locs
     sel_precip_loc = st.sidebar.selectbox("Precipitation: select location", locs_precip, index=0)
     if sel_precip_loc == "All":
         # if user selected a specific location in the weather table, prefer that
         if sel != "All":
             sel_precip_loc = sel
 
-    if sel_precip_loc != "All":
-        plot_df = pdf[pdf["location"] == sel_precip_loc].copy()
-    else:
-        plot_df = pdf.copy()
+    try:
+        plot_df = load_precip(DB_PATH, None if sel_precip_loc == "All" else sel_precip_loc)
+    except Exception as e:
+        st.warning(f"Cannot load precipitation data: {e}")
+        return
 
     if plot_df.empty:
         st.info("No precipitation records for selection.")
@@ -95,18 +232,6 @@ def main():
     # offer two modes: period-as-x (user requested) or time-series
     mode = st.sidebar.radio("Plot mode", ["Period as X-axis", "Time series (date as X)"])
 
-    PERIOD_ORDER = [
-        "Now",
-        "Past10Min",
-        "Past1hr",
-        "Past3hr",
-        "Past6hr",
-        "Past12hr",
-        "Past24hr",
-        "Past2days",
-        "Past3days",
-    ]
-
     if mode == "Period as X-axis":
         # select a specific observation time (date)
         dates = sorted(plot_df["date"].dropna().unique().tolist(), reverse=True)
@@ -121,39 +246,31 @@ def main():
             if recs.empty:
                 st.info("No precipitation records for that date.")
             else:
-                # map periods to values
-                val_map = {r["period"]: r["precipitation"] for _, r in recs.iterrows()}
-                vals = [val_map.get(p, None) for p in PERIOD_ORDER]
-                periods_df = pd.DataFrame({"period": PERIOD_ORDER, "precipitation": vals})
+                # map periods to values (missing periods become NaN gaps)
+                s = recs.drop_duplicates("period", keep="last").set_index("period")["precipitation"]
+                periods_df = s.reindex(PERIOD_ORDER).rename_axis("period").reset_index()
                 st.write(f"Precipitation for {sel_precip_loc} at {chosen_date}")
-                chart = alt.Chart(periods_df).mark_line(point=True).encode(
-                    x=alt.X("period:N", sort=PERIOD_ORDER, title="Period"),
-                    y=alt.Y("precipitation:Q", title="Precipitation (mm)"),
-                ).properties(width=700)
-                st.altair_chart(chart, use_container_width=True)
+                spec = build_period_chart_spec(tuple(periods_df.itertuples(index=False, name=None)))
+                st.vega_lite_chart(spec, use_container_width=True)
                 st.dataframe(periods_df)
 
     else:
         # Time series mode: user picks a period (or All)
-        periods = ["All"] + sorted(plot_df["period"].dropna().unique().tolist(), key=lambda x: PERIOD_ORDER.index(x) if x in PERIOD_ORDER else 999)
+        periods = ["All"] + sorted(plot_df["period"].dropna().unique().tolist(), key=lambda x: PERIOD_RANK.get(x, 999))
         sel_period = st.sidebar.selectbox("Filter by period (e.g. Past24hr)", periods)
         if sel_period != "All":
-            ts = plot_df[plot_df["period"] == sel_period].copy()
-            ts["date_parsed"] = pd.to_datetime(ts["date"], errors="coerce")
-            ts = ts.sort_values("date_parsed")
+            ts = plot_df.loc[plot_df["period"].eq(sel_period)].sort_values("date_parsed")
             if ts.empty or ts["date_parsed"].isna().all():
                 st.info("No valid time series data for that period.")
             else:
-                st.line_chart(ts.set_index("date_parsed")["precipitation"])
+                st.line_chart(downsample_series(ts.set_index("date_parsed")["precipitation"]))
         else:
-            # pivot so multiple periods can be shown
-            plot_df["date_parsed"] = pd.to_datetime(plot_df["date"], errors="coerce")
-            plot_df = plot_df.sort_values("date_parsed")
-            pivot = plot_df.pivot_table(index="date_parsed", columns="period", values="precipitation", aggfunc="mean")
+            # pivot so multiple periods can be shown (groupby already sorts by date)
+            pivot = plot_df.groupby(["date_parsed", "period"], sort=True)["precipitation"].mean().unstack("period")
             if pivot.empty:
                 st.info("No valid time series data to plot.")
             else:
-                st.line_chart(pivot)
+                st.line_chart(downsample_frame(pivot))
 
 
 if __name__ == "__main__":
@@ -6,32 +6,148 @@ Usage:
 
 This will create (or open) `data.db` in the same folder and insert parsed rows into `weather` table.
 """
+import ijson
+import pandas as pd
 import requests
+import orjson
 import sqlite3
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3Error
+from urllib3.util.retry import Retry
+import io
 import logging
 import sys
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 URL = (
     "https://opendata.cwa.gov.tw/fileapi/v1/opendataapi/O-A0002-001?"
     "Authorization=CWA-6A637F34-99A3-4F45-8497-EAB9D7FA1CA7&downloadType=WEB&format=JSON"
 )
 DB_PATH = "data.db"
+RAW_PATH = "raw.json"
+# ijson prefix of the per-station items in the CWA station payload
+STATION_PREFIX = "cwaopendata.dataset.Station.item"
+BATCH_SIZE = 500
+
+# known weatherElement names -> row slot; anything else falls back to substring checks in _element_slot
+ELEMENT_MAP = {
+    "MinT": "min",
+    "TMin": "min",
+    "MinTemperature": "min",
+    "MaxT": "max",
+    "TMax": "max",
+    "MaxTemperature": "max",
+    "Wx": "desc",
+    "Weather": "desc",
+    "WeatherDescription": "desc",
+}
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+# shared session so repeated fetches in one process reuse the TLS connection
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=2, max_retries=Retry(total=3, backoff_factor=0.2)))
+_SESSION.headers.update({"Accept-Encoding": "gzip"})
 
-def fetch_json(url: str) -> Any:
+
+class _TeeReader:
+    """File-like wrapper over `src` that copies what it reads into `sink` and `buffer`.
+
+    `sink` is the raw.json copy and is best-effort: on the first failed write the
+    error is logged and the sink is dropped. `buffer` keeps the bytes in memory for
+    the non-Station fallback until the caller sets it to None.
+    """
+
+    def __init__(self, src: Any, sink: Any) -> None:
+        self._src = src
+        self._sink = sink
+        self.buffer: Optional[io.BytesIO] = io.BytesIO()
+
+    @property
+    def saved(self) -> bool:
+        return self._sink is not None
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._src.read(size)
+        if self.buffer is not None:
+            self.buffer.write(chunk)
+        if self._sink is not None:
+            try:
+                self._sink.write(chunk)
+            except OSError as e:
+                logging.warning(f"Failed to save raw JSON: {e}")
+                self._close_sink()
+        return chunk
+
+    def _close_sink(self) -> None:
+        sink, self._sink = self._sink, None
+        try:
+            sink.close()
+        except OSError:
+            pass
+
+    def finish(self) -> None:
+        """Close the sink; buffered writes can still fail on the final flush."""
+        if self._sink is None:
+            return
+        try:
+            self._sink.close()
+        except OSError as e:
+            logging.warning(f"Failed to save raw JSON: {e}")
+            self._sink = None
+
+
+def open_stream(url: str) -> requests.Response:
+    """Start a streaming download of `url`; the body is read by `stream_batches`."""
+    logging.info(f"Requesting: {url}")
+    r = _SESSION.get(url, stream=True, timeout=20)
     try:
-        logging.info(f"Requesting: {url}")
-        r = requests.get(url, timeout=20)
         r.raise_for_status()
-        return r.json()
-    except Exception as e:
-        logging.error(f"Failed to fetch JSON: {e}")
+    except Exception:
+        r.close()
         raise
+    r.raw.decode_content = True
+    return r
+
+
+def stream_batches(r: requests.Response, path: str, size: int = BATCH_SIZE) -> Iterator[Any]:
+    """Yield lists of station dicts as they are parsed from the response body.
+
+    The body is copied to `path` in the same pass; that copy is best-effort and
+    parsing never reads it back. Payloads in other shapes are kept in memory
+    while streaming, then parsed whole so the extractors can apply their usual
+    heuristics.
+    """
+    try:
+        sink: Any = open(path, "wb")
+    except OSError as e:
+        logging.warning(f"Failed to save raw JSON: {e}")
+        sink = None
+
+    tee = _TeeReader(r.raw, sink)
+    streamed = False
+    try:
+        batch: List[Dict] = []
+        for station in ijson.items(tee, STATION_PREFIX, use_float=True):
+            if not streamed:
+                # a Station payload never needs the whole-document fallback
+                streamed = True
+                tee.buffer = None
+            batch.append(station)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        tee.finish()
+    if tee.saved:
+        logging.info(f"Saved raw JSON to {path}")
+    if streamed:
+        return
+
+    yield orjson.loads(tee.buffer.getvalue())
 
 
 def _get_first_available(obj: Dict, keys: List[str]) -> Optional[Any]:
@@ -41,26 +157,47 @@ def _get_first_available(obj: Dict, keys: List[str]) -> Optional[Any]:
     return None
 
 
-def parse_locations(data: Any) -> List[Dict[str, Optional[str]]]:
-    """Try to parse common CWA / open-data JSON structures into rows.
+def _location_name(loc: Dict) -> Any:
+    # plain dict.get chain: cheaper than _get_first_available for these single-key reads
+    return (
+        loc.get("StationName") or loc.get("locationName") or loc.get("location") or loc.get("name")
+        or loc.get("area") or loc.get("county") or loc.get("city") or "Unknown"
+    )
+
 
-    Returns list of dict with keys: location, date, min_temp, max_temp, description
-    """
-    rows: List[Dict[str, Optional[str]]] = []
+def _element_slot(name: Any) -> Optional[str]:
+    if not isinstance(name, str):
+        return None
+    slot = ELEMENT_MAP.get(name)
+    if slot is not None:
+        return slot
+    # checked in order, so e.g. "min" wins over "max" like the original keyword chain
+    lname = name.lower()
+    if "min" in lname:
+        return "min"
+    if "max" in lname:
+        return "max"
+    if "wx" in lname or "weather" in lname or "description" in lname:
+        return "desc"
+    return None
 
-    # helper: detect cwaopendata.dataset.Station
-    def _get_station_list(d: Any) -> Optional[List[Dict]]:
-        try:
-            if isinstance(d, dict) and "cwaopendata" in d and isinstance(d["cwaopendata"], dict):
-                ds = d["cwaopendata"].get("dataset")
-                if isinstance(ds, dict):
-                    st = ds.get("Station")
-                    if isinstance(st, list):
-                        return st
-        except Exception:
-            return None
+
+def _get_station_list(d: Any) -> Optional[List[Dict]]:
+    """Detect cwaopendata.dataset.Station."""
+    try:
+        if isinstance(d, dict) and "cwaopendata" in d and isinstance(d["cwaopendata"], dict):
+            ds = d["cwaopendata"].get("dataset")
+            if isinstance(ds, dict):
+                st = ds.get("Station")
+                if isinstance(st, list):
+                    return st
+    except Exception:
         return None
+    return None
+
 
+def _resolve_stations(data: Any) -> List[Dict]:
+    """Find the list of location/station dicts in common CWA / open-data JSON structures."""
     # Find candidate location list
     locations = None
     # check cwaopendata dataset Station first
@@ -90,9 +227,18 @@ def parse_locations(data: Any) -> List[Dict[str, Optional[str]]]:
     if not locations:
         logging.warning("No location list found in JSON; attempting to interpret top-level dict as one record")
         if isinstance(data, dict):
-            locations = [data]
-        else:
-            return rows
+            return [data]
+        return []
+
+    return locations
+
+
+def extract_weather(locations: List[Dict]) -> List[Dict[str, Optional[str]]]:
+    """Parse weather rows from the list returned by `_resolve_stations`.
+
+    Returns list of dict with keys: location, date, min_temp, max_temp, description
+    """
+    rows: List[Dict[str, Optional[str]]] = []
 
     for loc in locations:
         try:
@@ -100,84 +246,82 @@ def parse_locations(data: Any) -> List[Dict[str, Optional[str]]]:
                 continue
 
             # If Station format, prefer StationName and ObsTime.DateTime
-            location_name = None
-            if "StationName" in loc:
-                location_name = loc.get("StationName")
-            if not location_name:
-                location_name = _get_first_available(loc, ["locationName", "location", "name", "area", "county", "city"]) or "Unknown"
+            location_name = _location_name(loc)
+            we = loc.get("weatherElement")
+            elements = we if isinstance(we, list) else ()
 
             # Date heuristics
             date_val = None
             # 1) common: 'time' -> list -> startTime
-            if "time" in loc and isinstance(loc["time"], list) and loc["time"]:
-                first_time = loc["time"][0]
-                date_val = _get_first_available(first_time, ["startTime", "dataTime", "time"]) or date_val
+            times = loc.get("time")
+            if isinstance(times, list) and times and isinstance(times[0], dict):
+                first_time = times[0]
+                date_val = first_time.get("startTime") or first_time.get("dataTime") or first_time.get("time")
 
             # If Station format, check ObsTime.DateTime
-            if not date_val and "ObsTime" in loc and isinstance(loc["ObsTime"], dict):
-                dt = loc["ObsTime"].get("DateTime")
-                if dt:
-                    date_val = dt
+            obs = loc.get("ObsTime")
+            if not date_val and isinstance(obs, dict):
+                date_val = obs.get("DateTime")
 
             # 2) weatherElement entries may have time lists
-            if not date_val and "weatherElement" in loc and isinstance(loc["weatherElement"], list):
-                for e in loc["weatherElement"]:
-                    if isinstance(e, dict) and "time" in e and isinstance(e["time"], list) and e["time"]:
-                        t0 = e["time"][0]
-                        date_val = _get_first_available(t0, ["startTime", "dataTime"]) or date_val
+            if not date_val:
+                for e in elements:
+                    et = e.get("time") if isinstance(e, dict) else None
+                    if isinstance(et, list) and et and isinstance(et[0], dict):
+                        date_val = et[0].get("startTime") or et[0].get("dataTime")
                         if date_val:
                             break
 
             # 3) fallback: direct keys
-            date_val = date_val or _get_first_available(loc, ["date", "forecastDate", "dataTime"]) or datetime.utcnow().isoformat()
+            date_val = date_val or loc.get("date") or loc.get("forecastDate") or loc.get("dataTime") or datetime.utcnow().isoformat()
 
             # Temperatures and description heuristics
             min_temp = None
             max_temp = None
             description = None
 
-            if "weatherElement" in loc and isinstance(loc["weatherElement"], list):
-                for element in loc["weatherElement"]:
-                    if not isinstance(element, dict):
-                        continue
-                    name = element.get("elementName") or element.get("element") or element.get("parameterName") or element.get("name")
+            for element in elements:
+                if not isinstance(element, dict):
+                    continue
+                get = element.get
+                name = get("elementName") or get("element") or get("parameterName") or get("name")
+
+                # parameter value could be under element['time'][0]['parameter']['parameterName']
+                val = None
+                et = get("time")
+                if isinstance(et, list) and et:
+                    t0 = et[0]
+                    if isinstance(t0, dict):
+                        # many variants
+                        val = _get_first_available(t0, ["startTime", "dataTime"])  # not the value
+                        # parameter nested
+                        param = None
+                        tp = t0.get("parameter")
+                        ev = t0.get("elementValue")
+                        if isinstance(tp, dict):
+                            param = tp.get("parameterName") or tp.get("parameterValue")
+                        elif isinstance(ev, dict):
+                            param = ev.get("value")
+                        if param is not None:
+                            val = param
+                # direct 'parameter' on element
+                if val is None:
+                    val = _get_first_available(element, ["parameter", "value", "elementValue", "forecast", "parameterName"]) or None
+
+                if val is None and isinstance(et, list) and et:
+                    # sometimes parameter nested deeper
+                    try:
+                        val = et[0].get("parameter", {}).get("parameterName")
+                    except Exception:
+                        val = None
 
-                    # parameter value could be under element['time'][0]['parameter']['parameterName']
-                    val = None
-                    if "time" in element and isinstance(element["time"], list) and element["time"]:
-                        t0 = element["time"][0]
-                        if isinstance(t0, dict):
-                            # many variants
-                            val = _get_first_available(t0, ["startTime", "dataTime"])  # not the value
-                            # parameter nested
-                            param = None
-                            if "parameter" in t0 and isinstance(t0["parameter"], dict):
-                                param = t0["parameter"].get("parameterName") or t0["parameter"].get("parameterValue")
-                            elif "elementValue" in t0 and isinstance(t0["elementValue"], dict):
-                                param = t0["elementValue"].get("value")
-                            if param is not None:
-                                val = param
-                    # direct 'parameter' on element
-                    if val is None:
-                        val = _get_first_available(element, ["parameter", "value", "elementValue", "forecast", "parameterName"]) or None
-
-                    if val is None and isinstance(element.get("time"), list) and element["time"]:
-                        # sometimes parameter nested deeper
-                        try:
-                            val = element["time"][0].get("parameter", {}).get("parameterName")
-                        except Exception:
-                            val = None
-
-                    lname = (name or "").lower() if name else ""
-                    if any(k in lname for k in ["mint", "min", "tmin"]):
-                        min_temp = val
-                    elif any(k in lname for k in ["maxt", "max", "tmax"]):
-                        max_temp = val
-                    elif any(k in lname for k in ["wx", "weather", "description", "wxvalue", "wx_desc"]):
-                        description = val
-                    elif any(k in lname for k in ["temp"]):
-                        # some datasets have a temp field - skip
-                        pass
+                slot = _element_slot(name)
+                if slot == "min":
+                    min_temp = val
+                elif slot == "max":
+                    max_temp = val
+                elif slot == "desc":
+                    description = val
 
             # If description not found, try other keys
             if not description:
@@ -198,6 +342,9 @@ def parse_locations(data: Any) -> List[Dict[str, Optional[str]]]:
 
 
 def init_db(conn: sqlite3.Connection) -> None:
+    # WAL lets the Streamlit app read while we write; NORMAL skips the fsync on every commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     cur = conn.cursor()
     cur.execute(
         """
@@ -212,6 +359,9 @@ def init_db(conn: sqlite3.Connection) -> None:
         )
         """
     )
+    # match the viewer's (filtered and unfiltered) ORDER BY so rows come back without a sort step
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_weather_location_date_id ON weather(location, date DESC, id DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_weather_date_id ON weather(date DESC, id DESC)")
     conn.commit()
 
     # precipitation table
@@ -227,99 +377,64 @@ def init_db(conn: sqlite3.Connection) -> None:
         )
         """
     )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_precipitation_location_date_id ON precipitation(location, date DESC, id DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_precipitation_date_id ON precipitation(date DESC, id DESC)")
     conn.commit()
 
 
+def _to_params(rows: List[Dict[str, Optional[str]]], cols: List[str], numeric: List[str]) -> List[Tuple]:
+    """Build insert tuples from `rows`, coercing `numeric` columns to float (bad values -> None)."""
+    df = pd.DataFrame(rows, columns=cols)
+    for c in numeric:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+
 def insert_rows(conn: sqlite3.Connection, rows: List[Dict[str, Optional[str]]]) -> int:
-    cur = conn.cursor()
-    inserted = 0
-    for r in rows:
-        try:
-            # Try to coerce min/max to float when possible
-            minv = float(r["min_temp"]) if r.get("min_temp") not in (None, "") else None
-            maxv = float(r["max_temp"]) if r.get("max_temp") not in (None, "") else None
-            cur.execute(
-                "INSERT INTO weather (location, date, min_temp, max_temp, description) VALUES (?, ?, ?, ?, ?)",
-                (r.get("location"), r.get("date"), minv, maxv, r.get("description")),
-            )
-            inserted += 1
-        except Exception as e:
-            logging.debug(f"Failed to insert row {r}: {e}")
-            continue
-    conn.commit()
-    return inserted
+    if not rows:
+        return 0
+    # coerce min/max to float up front; the caller owns the transaction
+    params = _to_params(rows, ["location", "date", "min_temp", "max_temp", "description"], ["min_temp", "max_temp"])
+    conn.executemany(
+        "INSERT INTO weather (location, date, min_temp, max_temp, description) VALUES (?, ?, ?, ?, ?)",
+        params,
+    )
+    return len(params)
 
 
-def parse_precipitation(data: Any) -> List[Dict[str, Optional[str]]]:
-    """Parse RainfallElement from JSON into list of records:
+def extract_precip(locations: List[Dict]) -> List[Dict[str, Optional[str]]]:
+    """Parse RainfallElement from the list returned by `_resolve_stations` into records:
        {location, date, period, precipitation}
     """
     out: List[Dict[str, Optional[str]]] = []
 
-    # helper: detect cwaopendata.dataset.Station
-    def _get_station_list(d: Any) -> Optional[List[Dict]]:
-        try:
-            if isinstance(d, dict) and "cwaopendata" in d and isinstance(d["cwaopendata"], dict):
-                ds = d["cwaopendata"].get("dataset")
-                if isinstance(ds, dict):
-                    st = ds.get("Station")
-                    if isinstance(st, list):
-                        return st
-        except Exception:
-            return None
-        return None
-
-    # locate records list similar to parse_locations
-    locations = None
-    stations = _get_station_list(data)
-    if stations:
-        locations = stations
-    if isinstance(data, dict):
-        if "records" in data:
-            rec = data["records"]
-            if isinstance(rec, dict) and "location" in rec:
-                locations = rec["location"]
-            elif isinstance(rec, list):
-                locations = rec
-        if locations is None:
-            if "location" in data and isinstance(data["location"], list):
-                locations = data["location"]
-            elif "locations" in data and isinstance(data["locations"], list):
-                locations = data["locations"]
-            elif "features" in data and isinstance(data["features"], list):
-                locations = [f.get("properties", {}) for f in data["features"]]
-    elif isinstance(data, list):
-        locations = data
-
-    if not locations:
-        return out
-
     for loc in locations:
         try:
             if not isinstance(loc, dict):
                 continue
             # prefer StationName if present
-            location_name = None
-            if "StationName" in loc:
-                location_name = loc.get("StationName")
-            if not location_name:
-                location_name = _get_first_available(loc, ["locationName", "location", "name", "area", "county", "city"]) or "Unknown"
+            location_name = _location_name(loc)
+            we = loc.get("weatherElement")
+            elements = we if isinstance(we, list) else ()
 
             # extract date: prefer ObsTime.DateTime for Station format
             date_val = None
-            if "ObsTime" in loc and isinstance(loc["ObsTime"], dict):
-                date_val = loc["ObsTime"].get("DateTime") or date_val
-            if not date_val and "time" in loc and isinstance(loc["time"], list) and loc["time"]:
-                first_time = loc["time"][0]
-                date_val = _get_first_available(first_time, ["startTime", "dataTime", "time"]) or date_val
-            if not date_val and "weatherElement" in loc and isinstance(loc["weatherElement"], list):
-                for e in loc["weatherElement"]:
-                    if isinstance(e, dict) and "time" in e and isinstance(e["time"], list) and e["time"]:
-                        t0 = e["time"][0]
-                        date_val = _get_first_available(t0, ["startTime", "dataTime"]) or date_val
+            obs = loc.get("ObsTime")
+            if isinstance(obs, dict):
+                date_val = obs.get("DateTime")
+            times = loc.get("time")
+            if not date_val and isinstance(times, list) and times and isinstance(times[0], dict):
+                first_time = times[0]
+                date_val = first_time.get("startTime") or first_time.get("dataTime") or first_time.get("time")
+            if not date_val:
+                for e in elements:
+                    et = e.get("time") if isinstance(e, dict) else None
+                    if isinstance(et, list) and et and isinstance(et[0], dict):
+                        date_val = et[0].get("startTime") or et[0].get("dataTime")
                         if date_val:
                             break
-            date_val = date_val or _get_first_available(loc, ["date", "forecastDate", "dataTime"]) or datetime.utcnow().isoformat()
+            date_val = date_val or loc.get("date") or loc.get("forecastDate") or loc.get("dataTime") or datetime.utcnow().isoformat()
 
             rf = loc.get("RainfallElement") or loc.get("Rainfall") or loc.get("rainfall")
             if isinstance(rf, dict):
@@ -330,15 +445,12 @@ def parse_precipitation(data: Any) -> List[Dict[str, Optional[str]]]:
                         val = _get_first_available(sub, ["Precipitation", "Precip", "Value", "precipitation", "value"]) or None
                     else:
                         val = sub
-                    try:
-                        precip = float(val) if val not in (None, "") else None
-                    except Exception:
-                        precip = None
+                    # left raw: insert_precip_rows coerces the whole column at once
                     out.append({
                         "location": str(location_name),
                         "date": str(date_val),
                         "period": str(period),
-                        "precipitation": (None if precip is None else precip),
+                        "precipitation": val,
                     })
         except Exception:
             continue
@@ -347,59 +459,62 @@ def parse_precipitation(data: Any) -> List[Dict[str, Optional[str]]]:
 
 
 def insert_precip_rows(conn: sqlite3.Connection, rows: List[Dict[str, Optional[str]]]) -> int:
-    cur = conn.cursor()
-    inserted = 0
-    for r in rows:
-        try:
-            p = float(r.get("precipitation")) if r.get("precipitation") not in (None, "") else None
-            cur.execute(
-                "INSERT INTO precipitation (location, date, period, precipitation) VALUES (?, ?, ?, ?)",
-                (r.get("location"), r.get("date"), r.get("period"), p),
-            )
-            inserted += 1
-        except Exception:
-            continue
-    conn.commit()
-    return inserted
+    if not rows:
+        return 0
+    params = _to_params(rows, ["location", "date", "period", "precipitation"], ["precipitation"])
+    conn.executemany(
+        "INSERT INTO precipitation (location, date, period, precipitation) VALUES (?, ?, ?, ?)",
+        params,
+    )
+    return len(params)
 
 
 def main():
     try:
-        data = fetch_json(URL)
-    except Exception:
-        logging.error("Exiting due to fetch error.")
-        sys.exit(1)
-
-    # Save raw JSON for inspection
-    try:
-        with open("raw.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        logging.info("Saved raw JSON to raw.json")
+        r = open_stream(URL)
     except Exception as e:
-        logging.warning(f"Failed to save raw JSON: {e}")
-
-    rows = parse_locations(data)
-    logging.info(f"Parsed {len(rows)} rows from JSON")
-
-    if not rows:
-        logging.error("No rows to insert. Exiting.")
+        logging.error(f"Failed to fetch JSON: {e}")
+        logging.error("Exiting due to fetch error.")
         sys.exit(1)
 
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        init_db(conn)
-        n = insert_rows(conn, rows)
-        logging.info(f"Inserted {n} rows into {DB_PATH} (weather)")
-
-        # parse and insert precipitation rows if present
-        precip_rows = parse_precipitation(data)
-        if precip_rows:
-            m = insert_precip_rows(conn, precip_rows)
-            logging.info(f"Inserted {m} rows into {DB_PATH} (precipitation)")
-        else:
-            logging.info("No precipitation records found in JSON")
-    finally:
-        conn.close()
+    with r:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            init_db(conn)
+            parsed = n = m = 0
+            try:
+                # one transaction for the whole payload: a truncated or malformed
+                # body rolls back every batch inserted so far
+                with conn:
+                    # parsing and inserting overlap with the download and the raw.json write
+                    for batch in stream_batches(r, RAW_PATH):
+                        # locate the station list once and share it between both extractors
+                        stations = _resolve_stations(batch)
+                        rows = extract_weather(stations)
+                        parsed += len(rows)
+                        n += insert_rows(conn, rows)
+
+                        # parse and insert precipitation rows if present
+                        precip_rows = extract_precip(stations)
+                        if precip_rows:
+                            m += insert_precip_rows(conn, precip_rows)
+            except (requests.RequestException, Urllib3Error, ijson.JSONError, ValueError) as e:
+                logging.error(f"Failed to fetch JSON: {e}")
+                logging.error("Exiting due to fetch error.")
+                sys.exit(1)
+            logging.info(f"Parsed {parsed} rows from JSON")
+
+            if not parsed:
+                logging.error("No rows to insert. Exiting.")
+                sys.exit(1)
+
+            logging.info(f"Inserted {n} rows into {DB_PATH} (weather)")
+            if m:
+                logging.info(f"Inserted {m} rows into {DB_PATH} (precipitation)")
+            else:
+                logging.info("No precipitation records found in JSON")
+        finally:
+            conn.close()
 
 
 if __name__ == "__main__":
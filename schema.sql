@@ -8,6 +8,8 @@ CREATE TABLE IF NOT EXISTS weather (
     description TEXT,
     inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+CREATE INDEX IF NOT EXISTS idx_weather_location_date_id ON weather(location, date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_weather_date_id ON weather(date DESC, id DESC);
 
 -- precipitation table: stores rainfall measurements per period (e.g. Past1hr, Past24hr)
 CREATE TABLE IF NOT EXISTS precipitation (
@@ -18,3 +20,5 @@ CREATE TABLE IF NOT EXISTS precipitation (
     precipitation REAL,
     inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+CREATE INDEX IF NOT EXISTS idx_precipitation_location_date_id ON precipitation(location, date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_precipitation_date_id ON precipitation(date DESC, id DESC);